@@ -11,11 +11,16 @@ Setup:
 3) Run: python jobs_daily.py
 4) Schedule (cron) at 11:00 Europe/Berlin.
 """
-from serpapi import GoogleSearch
-import os, smtplib, ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import asyncio
+import csv, functools, hashlib, io
+import operator, os, re, smtplib, ssl
+import aiohttp
+import orjson
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from email.message import EmailMessage
 from datetime import datetime
+from html import escape
 
 QUERIES = [
     "supply chain Berlin",
@@ -24,125 +29,375 @@ QUERIES = [
     "operations Berlin",
 ]
 
-ENTRY_LEVEL_KEYWORDS = ["entry level", "junior", "graduate"]
+# one compiled alternation instead of a substring scan per keyword
+ENTRY_LEVEL_PATTERN = re.compile(
+    r"\b(?:entry[- ]level|junior|werkstudent(?:in)?|trainee|graduate)\b", re.IGNORECASE
+)
+# cheap substring pre-check so most descriptions never reach the regex
+ENTRY_LEVEL_LITERALS = ("junior", "entry", "graduate", "trainee", "werkstudent")
+DESC_SCAN_CHARS = 512  # entry-level signals sit near the top of a description
+PREFERRED_TERMS = re.compile(
+    r"\b(?:supply\s*chain|procurement|logistics?\s*coordinat(?:or|ion))\b", re.IGNORECASE
+)
 
-def search_jobs(api_key):
-    all_results = []
-    for query in QUERIES:
-        params = {
-            "engine": "google_jobs",
-            "q": query,
-            "location": "Berlin, Germany",
-            "hl": "en",
-            "gl": "de",
-            "api_key": "3dd91fc1be83e18b600192c57984a7ac35d28ac93a0680682c2c2c54b40a0139",
+# single pass over the title; each named group adds its weight to the score
+SCORE_RE = re.compile(
+    f"(?P<pref>{PREFERRED_TERMS.pattern})|(?P<entry>{ENTRY_LEVEL_PATTERN.pattern})",
+    re.IGNORECASE,
+)
+SCORE_WEIGHTS = {"pref": 2, "entry": 1}
+POSTED_RE = re.compile(r"just|hour|\bday\b", re.IGNORECASE)  # posted within ~a day
+POSTED_TODAY_RE = re.compile(r"just|hour", re.IGNORECASE)  # "Just posted", "5 hours ago"
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+# constant part of every request; the API key is added from Config at run time
+BASE_PARAMS = {
+    "engine": "google_jobs",
+    "location": "Berlin, Germany",
+    "hl": "en",
+    "gl": "de",
+}
+HTTP_POOL_SIZE = 8
+HTTP_KEEPALIVE = 30  # seconds an idle serpapi.com socket stays open
+HTTP_TIMEOUT = 10
+
+CACHE_TTL = 6 * 60 * 60  # seconds; repeat runs on the same day reuse responses
+CACHE_DIR = ".cache"
+REDIS_TIMEOUT = 1  # seconds; an unreachable Redis must not stall the run
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    serpapi_key: str
+    sender: str
+    recipients: tuple[str, ...]
+    smtp_host: str
+    smtp_port: int
+    username: str
+    password: str
+
+    @classmethod
+    def from_env(cls):
+        """Read and validate settings, exiting before any network work if they are unusable."""
+        names = {
+            "serpapi_key": "SERPAPI_KEY",
+            "sender": "MAIL_FROM",
+            "recipients": "MAIL_TO",
+            "smtp_host": "SMTP_HOST",
+            "smtp_port": "SMTP_PORT",
+            "username": "SMTP_USERNAME",
+            "password": "SMTP_PASSWORD",
         }
-        search = GoogleSearch(params)
-        results = search.get_dict().get("jobs_results", [])
+        values = {field: os.getenv(var, "").strip() for field, var in names.items()}
+        missing = [names[field] for field, value in values.items() if not value]
+        if missing:
+            raise SystemExit(f"Missing required environment variables: {', '.join(missing)}")
+        try:
+            values["smtp_port"] = int(values["smtp_port"])
+        except ValueError:
+            raise SystemExit(f"SMTP_PORT must be an integer, got {values['smtp_port']!r}")
+        # MAIL_TO may list several comma-separated addresses
+        values["recipients"] = tuple(r.strip() for r in values["recipients"].split(",") if r.strip())
+        if not values["recipients"]:
+            raise SystemExit("MAIL_TO must contain at least one address")
+        return cls(**values)
+
+
+_cache = None  # opened lazily; False once disabled for this run
+
+
+def _get_cache():
+    # Redis if REDIS_URL is set and reachable, otherwise a local disk cache
+    global _cache
+    if _cache is None:
+        _cache = False
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+                client = redis.Redis.from_url(
+                    redis_url, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT
+                )
+                client.ping()
+                _cache = client
+            except Exception as e:
+                print(f"Redis cache unavailable, falling back to disk ({e})")
+        if _cache is False:
+            try:
+                import diskcache
+                _cache = diskcache.Cache(CACHE_DIR)
+            except Exception as e:
+                print(f"Disk cache unavailable, fetching without cache ({e})")
+    return _cache
+
+
+def _disable_cache(err):
+    # stop touching a broken cache for the rest of the run
+    global _cache
+    print(f"Cache error, continuing without cache ({err})")
+    _cache = False
+
+
+def memoize(ttl):
+    """Cache a coroutine's JSON result per (query, day) for `ttl` seconds.
+
+    Extra positional arguments are passed through but not part of the key.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(session, query, *args):
+            today = datetime.today().strftime("%Y%m%d")
+            key = "serpapi:" + hashlib.sha256(f"{query}|{today}".encode()).hexdigest()
+
+            cache = _get_cache()
+            if cache is not False:
+                try:
+                    cached = cache.get(key)
+                except Exception as e:
+                    _disable_cache(e)
+                else:
+                    if cached is not None:
+                        return orjson.loads(cached)
+
+            result = await fn(session, query, *args)
+
+            cache = _get_cache()
+            if cache is not False:
+                payload = orjson.dumps(result)
+                try:
+                    if hasattr(cache, "setex"):
+                        cache.setex(key, ttl, payload)
+                    else:
+                        cache.set(key, payload, expire=ttl)
+                except Exception as e:
+                    _disable_cache(e)
+            return result
+        return wrapper
+    return decorator
+
+
+@memoize(ttl=CACHE_TTL)
+async def _fetch(session, query, base_params):
+    params = {**base_params, "q": query}
+    async with session.get(SERPAPI_URL, params=params) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
+    return [_slim_job(j) for j in data.get("jobs_results", [])]
+
+
+def _link(j):
+    # prefer the posting itself; related_links are company homepage/web-search links
+    # (SerpAPI returns these lists populated or omits them)
+    ao = j.get("apply_options")
+    rl = j.get("related_links")
+    return (
+        (ao[0].get("link") if ao else None)
+        or j.get("share_link")
+        or (rl[0].get("link") if rl else None)
+        or ""
+    )
+
+
+def _slim_job(j):
+    # keep only the fields the digest uses instead of the full ~40-field result
+    return {
+        "title": j.get("title") or "",
+        "company_name": j.get("company_name") or "",
+        "location": j.get("location") or "",
+        "link": _link(j),
+        "description": (j.get("description") or "")[:DESC_SCAN_CHARS],
+        "detected_extensions": j.get("detected_extensions") or {},
+    }
+
+
+async def search_jobs_async(config):
+    # all queries run concurrently over one keep-alive session,
+    # so the TLS handshake to serpapi.com is paid once per pooled socket
+    connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, keepalive_timeout=HTTP_KEEPALIVE)
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        base_params = {**BASE_PARAMS, "api_key": config.serpapi_key}
+        tasks = [_fetch(session, query, base_params) for query in QUERIES]
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # fail the run instead of mailing an empty digest when nothing could be fetched
+    if all(isinstance(results, Exception) for results in responses):
+        raise SystemExit(f"All SerpAPI queries failed, last error: {responses[-1]!r}")
+
+    all_results = []
+    for query, results in zip(QUERIES, responses):
+        if isinstance(results, Exception):
+            print(f"Failed to fetch jobs for query: {query} ({results})")
+            continue
         print(f"Fetched {len(results)} jobs for query: {query}")
         all_results.extend(results)
 
     print(f"Total collected jobs (before deduplication): {len(all_results)}")
 
-    # deduplicate by (title, company)
-    seen = set()
+    # deduplicate by case- and whitespace-insensitive (title, company)
+    seen: set[tuple[str, str]] = set()
     unique_jobs = []
     for job in all_results:
-        key = (job.get("title"), job.get("company_name"))
+        key = (
+            (job.get("title") or "").casefold().strip(),
+            (job.get("company_name") or "").casefold().strip(),
+        )
         if key not in seen:
             seen.add(key)
+            # age in days, computed once so the sort key is a plain field lookup
+            ext = job.get("detected_extensions") or {}
+            age = ext.get("posted_at_days_ago")
+            if age is None:
+                # fallback if "3 days ago" style string; assume old if unknown
+                posted = ext.get("posted_at", "")
+                days = posted.split(" ", 1)[0]
+                if POSTED_TODAY_RE.search(posted):
+                    age = 0
+                elif days.isdigit() and "day" in posted:
+                    age = int(days)
+                else:
+                    age = 999
+            job["_age"] = age
+            # escaped once here so the digest loops only concatenate
+            job["_title_h"] = escape(job.get("title") or "")
+            job["_company_h"] = escape(job.get("company_name") or "")
+            job["_link_h"] = escape(job.get("link") or "")
             unique_jobs.append(job)
 
     print(f"Unique jobs after deduplication: {len(unique_jobs)}")
 
-    # sort by recency
-    def job_age(job):
-        ext = job.get("detected_extensions", {})
-        if "posted_at_days_ago" in ext:
-            return ext["posted_at_days_ago"]
-        elif "posted_at" in ext and "day" in ext["posted_at"]:
-            # fallback if "3 days ago" style string
-            try:
-                return int(ext["posted_at"].split()[0])
-            except:
-                return 999
-        return 999  # assume old if unknown
-
-    unique_jobs.sort(key=job_age)  # lowest days_ago = most recent
+    unique_jobs.sort(key=operator.itemgetter("_age"))  # lowest days_ago = most recent
+    score_jobs(unique_jobs)
     return unique_jobs
 
 
+def score_jobs(jobs):
+    # score once per job so the sort key is a plain int lookup;
+    # the sort is stable, so recency order is kept within equal scores
+    for job in jobs:
+        score = sum(SCORE_WEIGHTS[m.lastgroup] for m in SCORE_RE.finditer(job.get("title", "")))
+        if POSTED_RE.search(job.get("detected_extensions", {}).get("posted_at", "")):
+            score += 1
+        job["_score"] = score
+    jobs.sort(key=operator.itemgetter("_score"), reverse=True)
+
+
 def split_entry_level(jobs):
     entry, others = [], []
     for job in jobs:
-        title = job.get("title", "").lower()
-        if any(k in title for k in ENTRY_LEVEL_KEYWORDS):
+        title = job.get("title", "")
+        head = job.get("description", "")  # already cut to DESC_SCAN_CHARS by _slim_job
+        if ENTRY_LEVEL_PATTERN.search(title):
+            entry.append(job)
+            continue
+        head_lower = head.lower()
+        if any(lit in head_lower for lit in ENTRY_LEVEL_LITERALS) and ENTRY_LEVEL_PATTERN.search(head):
             entry.append(job)
         else:
             others.append(job)
     return entry, others
 
 
-def send_email(jobs_entry, jobs_other, sender, recipient, smtp_host, smtp_port, username, password):
+CSV_FIELDS = ["category", "title", "company_name", "location", "posted_at", "link"]
+
+
+def build_csv(jobs_entry, jobs_other):
+    # built in memory and attached directly, no temp file round-trip
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for category, jobs in (("entry", jobs_entry), ("other", jobs_other)):
+        writer.writerows(
+            {
+                "category": category,
+                "title": job.get("title", ""),
+                "company_name": job.get("company_name", ""),
+                "location": job.get("location", ""),
+                "posted_at": job.get("detected_extensions", {}).get("posted_at", ""),
+                "link": job.get("link", ""),
+            }
+            for job in jobs
+        )
+    return buf.getvalue().encode("utf-8")
+
+
+def send_email(jobs_entry, jobs_other, config):
     today = datetime.today().strftime("%Y-%m-%d")
     subject = f"Daily Berlin Supply Chain Digest ({today})"
 
-    html = f"<h2>Daily digest for Berlin ({today})</h2>"
+    # collect fragments and join once instead of re-copying the buffer per +=
+    parts = [f"<h2>Daily digest for Berlin ({today})</h2>"]
 
     if jobs_entry:
-        html += "<h3>🎯 Entry-level roles</h3><ul>"
+        parts.append("<h3>🎯 Entry-level roles</h3><ul>")
         for job in jobs_entry[:15]:
-            html += f"<li><b>{job.get('title')}</b> - {job.get('company_name')}<br>"
-            if "link" in job:
-                html += f"<a href='{job['link']}'>Apply here</a></li>"
-        html += "</ul>"
+            parts.append(f"<li><b>{job['_title_h']}</b> - {job['_company_h']}<br>")
+            if job["_link_h"]:
+                parts.append(f"<a href='{job['_link_h']}'>Apply here</a>")
+            parts.append("</li>")
+        parts.append("</ul>")
     else:
-        html += "<p>No entry-level roles found today.</p>"
+        parts.append("<p>No entry-level roles found today.</p>")
 
     if jobs_other:
-        html += "<h3>📌 Other recent roles</h3><ul>"
+        parts.append("<h3>📌 Other recent roles</h3><ul>")
         for job in jobs_other[:20]:
-            html += f"<li><b>{job.get('title')}</b> - {job.get('company_name')}<br>"
-            if "link" in job:
-                html += f"<a href='{job['link']}'>Apply here</a></li>"
-        html += "</ul>"
+            parts.append(f"<li><b>{job['_title_h']}</b> - {job['_company_h']}<br>")
+            if job["_link_h"]:
+                parts.append(f"<a href='{job['_link_h']}'>Apply here</a>")
+            parts.append("</li>")
+        parts.append("</ul>")
     else:
-        html += "<p>No other roles found.</p>"
+        parts.append("<p>No other roles found.</p>")
+
+    html = "".join(parts)
 
-    msg = MIMEMultipart("alternative")
+    msg = EmailMessage()
     msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = recipient
-    msg.attach(MIMEText(html, "html"))
+    msg["From"] = config.sender
+    msg["To"] = config.recipients[0]
+    msg.set_content(
+        f"Daily digest for Berlin ({today}): {len(jobs_entry)} entry-level and "
+        f"{len(jobs_other)} other roles. View this email as HTML or open the attached CSV."
+    )
+    msg.add_alternative(html, subtype="html")
+    msg.add_attachment(
+        build_csv(jobs_entry, jobs_other),
+        maintype="text",
+        subtype="csv",
+        filename=f"berlin_jobs_{today}.csv",
+    )
 
     context = ssl.create_default_context()
 
-    if int(smtp_port) == 465:
+    # one SMTP session for all recipients, reusing the TLS connection
+    if config.smtp_port == 465:
         # SSL/TLS
-        with smtplib.SMTP_SSL(smtp_host, int(smtp_port), context=context) as server:
-            server.login(username, password)
-            server.sendmail(sender, recipient, msg.as_string())
+        with smtplib.SMTP_SSL(config.smtp_host, config.smtp_port, context=context) as server:
+            server.login(config.username, config.password)
+            _send_to_all(server, msg, config.recipients)
     else:
         # STARTTLS (e.g., port 587)
-        with smtplib.SMTP(smtp_host, int(smtp_port)) as server:
+        with smtplib.SMTP(config.smtp_host, config.smtp_port) as server:
             server.starttls(context=context)
-            server.login(username, password)
-            server.sendmail(sender, recipient, msg.as_string())
+            server.login(config.username, config.password)
+            _send_to_all(server, msg, config.recipients)
+
+
+def _send_to_all(server, msg, recipients):
+    for recipient in recipients:
+        msg.replace_header("To", recipient)
+        server.send_message(msg)
 
 
 def main():
-    serpapi_key = os.environ["SERPAPI_KEY"]
-    sender = os.environ["MAIL_FROM"]
-    recipient = os.environ["MAIL_TO"]
-    smtp_host = os.environ["SMTP_HOST"]
-    smtp_port = os.environ["SMTP_PORT"]
-    username = os.environ["SMTP_USERNAME"]
-    password = os.environ["SMTP_PASSWORD"]
-
-    jobs = search_jobs(serpapi_key)
+    load_dotenv()
+    config = Config.from_env()
+
+    jobs = asyncio.run(search_jobs_async(config))
     entry_jobs, other_jobs = split_entry_level(jobs)
 
-    send_email(entry_jobs, other_jobs, sender, recipient, smtp_host, smtp_port, username, password)
+    send_email(entry_jobs, other_jobs, config)
 
 
 if __name__ == "__main__":